@@ -8,10 +8,8 @@ Cli Typical Usage: py justone.py FOLDER [FOLDER ...] -t
 Sample:
 
 ```
-import hashlib
-
-# find duplicate files
-dups_list = JustOne(hashlib.sha1).update('D:/data').update(Path('C:/Wegame')).duplicates()
+# find duplicate files (use JustOne(hashlib.sha1) if you insist on a secure hash)
+dups_list = JustOne().update('D:/data').update(Path('C:/Wegame')).duplicates()
 # OR dups_list = JustOne()('D:/data')(Path('C:/Wegame')).dup()
 
 # print them
@@ -43,31 +41,48 @@ Misc variables:
 """
 
 import argparse
+import array
 import filecmp
+import hashlib
 import itertools
+import mmap
+import os
+import sqlite3
 import stat
 import sys
+import threading
 import time
 import traceback
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from enum import IntEnum
-from io import BufferedReader
 from os import DirEntry, PathLike, scandir
 from pathlib import Path
 from typing import AnyStr, Callable, DefaultDict, Dict, Final, Generator, Iterable, Iterator, List, Literal, Optional, Sequence, Set, TextIO, Tuple, Type, Union
 
-try:
-    import xxhash
-    _hash_func_default: Callable = xxhash.xxh3_128 # xxhash.xxh3_128 is six times as fast as hashlib.sha1 .
-except ModuleNotFoundError:
-    import hashlib
-    _hash_func_default: Callable = hashlib.sha1
+# Dedup does not need a cryptographic hash, so xxhash is a hard dependency now.
+# XXH3 is SIMD-vectorized (the C library auto-dispatches SSE2/AVX2/AVX-512/NEON,
+# so no per-arch branching is needed here) and several times faster than
+# hashlib.sha1; the 64-bit variant halves the per-file digest memory of xxh3_128
+# while a random collision still needs billions of files, and the strict levels
+# are there for the paranoid.
+# (Pass hash_func=hashlib.sha1 to JustOne yourself if you want a secure hash.)
+import xxhash
+
+_hash_func_default: Callable = xxhash.xxh3_64
 
 try:
     from tqdm import tqdm as tqdm_real
 
-    def tqdm(arg, desc=None):
-        return tqdm_real(tuple(arg), desc=desc, ascii=False, leave=True)
+    def tqdm(arg, desc=None, total=None):
+        # never materialize the iterable just for a progress total: take an explicit
+        # total, fall back to len() when the argument already knows its own
+        if total is None:
+            try:
+                total = len(arg)
+            except TypeError:
+                pass
+        return tqdm_real(arg, desc=desc, total=total, ascii=False, leave=True)
 except ModuleNotFoundError:
 
     def tqdm(arg, *_args, **_kwargs):
@@ -83,10 +98,13 @@ __maintainer__: Final[str] = 'owtotwo'
 __email__: Final[str] = 'owtotwo@163.com'
 __status__: Final[str] = 'Experimental'
 
-FileIndex: Type = int # the index of file_info
+FileIndex: Type = int # the index into the parallel file info arrays (paths/sizes/small_hashes/full_hashes)
 FileSize: Type = int # the number of bytes
-HashValue: Type = bytes # the type of hash calculation result
+HashValue: Type = Union[int, bytes] # a native int from intdigest() (xxhash), or digest() bytes for hashlib hashes
 SinglePath: Type = Union[str, Path] # file or directory
+PathStr: Type = str # normalized path string kept internally (Path objects are only built on output)
+IndexBucket: Type = Union[FileIndex, Set[FileIndex]] # a bare index while a bucket holds one file, a set from the first collision on
+SmallHashKey: Type = Union[int, Tuple[FileSize, HashValue]] # size and small hash packed into one int when the digest is an int
 IterablePaths: Type = Iterable[SinglePath] # some files or directories
 
 
@@ -100,8 +118,10 @@ class StrictLevel(IntEnum):
 _DEBUG_MODE: Final[bool] = False
 
 HASH_FUNCTION_DEFAULT: Final[Callable] = _hash_func_default
-SMALL_HASH_CHUNK_SIZE_DEFAULT: Final[int] = 1024
-FULL_HASH_CHUNK_SIZE_DEFAULT: Final[int] = 524288 # 512kb
+SMALL_HASH_CHUNK_SIZE_DEFAULT: Final[int] = 4096 # one page: a smaller pread transfers a full page from the device anyway
+FULL_HASH_CHUNK_SIZE_DEFAULT: Final[int] = 1048576 # 1mb
+MMAP_MIN_FILE_SIZE_DEFAULT: Final[int] = 1048576 # 1mb, files not smaller than this are hashed via mmap
+HASH_WORKERS_DEFAULT: Final[int] = min(32, (os.cpu_count() or 1) * 4) # thread count for the hashing passes (I/O bound, GIL released in C)
 STRICT_LEVEL_DEFAULT: Final[StrictLevel] = StrictLevel.COMMON
 
 
@@ -139,50 +159,266 @@ class GetDuplicatesError(JustOneError):
 
 # return string like '[aaa] -> [bbb] -> [ccc]'
 def format_exception_chain(e: BaseException) -> str:
-    # recursive function, get exception chain from __cause__
-    def get_exception_chain(e: BaseException) -> List[BaseException]:
-        return [e] if e.__cause__ is None else [e] + get_exception_chain(e.__cause__)
-
+    # iterative walk over __cause__, no recursion overhead or stack-depth risk
+    chain: List[BaseException] = []
+    exc: Optional[BaseException] = e
+    while exc is not None:
+        chain.append(exc)
+        exc = exc.__cause__
     # use Exception class name as string if no message in Exception object
     e2s = lambda e: str(e) or e.__class__.__name__
-    return ''.join(f'[{e2s(exc)}]' if i == 0 else f' -> [{e2s(exc)}]' for i, exc in enumerate(reversed(get_exception_chain(e))))
+    return ' -> '.join(f'[{e2s(exc)}]' for exc in reversed(chain))
+
+
+# When a small-hash group holds exactly two unhashed files, a direct byte compare
+# is cheaper than two full hashes, so instead of real digests those files get a
+# sentinel "hash" derived from the file index. The prefix keeps sentinels apart
+# from any real digest (which is plain fixed-width binary).
+_PAIR_SENTINEL_PREFIX: Final[bytes] = b'justone:pair-cmp:'
+
+
+def _make_pair_sentinel(index: FileIndex) -> HashValue:
+    return _PAIR_SENTINEL_PREFIX + b'%d' % index
+
+
+def _is_pair_sentinel(hash_value: HashValue) -> bool:
+    return isinstance(hash_value, bytes) and hash_value.startswith(_PAIR_SENTINEL_PREFIX)
+
+
+def _make_small_hash_key(file_size: FileSize, small_hash: HashValue) -> SmallHashKey:
+    # hashing one int key costs a single word mix; a 2-tuple key hashes both
+    # children plus the tuple itself. An int digest is < 2**64, so the size can
+    # sit in the bits above it without overlap. Bytes digests keep the tuple.
+    if isinstance(small_hash, int):
+        return (file_size << 64) | small_hash
+    return (file_size, small_hash)
+
+
+def _root_covers(root: PathStr, path: PathStr) -> bool:
+    # whether scanning root (a normalized path) also reaches path (another one)
+    if root == os.curdir:
+        # '.' reaches every relative path that does not climb out through '..'
+        return path != os.curdir and not os.path.isabs(path) and path.split(os.sep, 1)[0] != os.pardir
+    if not root.endswith(os.sep): # normpath keeps a trailing sep only on a filesystem/drive root
+        root += os.sep
+    return path.startswith(root)
+
+
+def _hash_func_id(hash_func: Callable) -> str:
+    # identify the digest producer (e.g. 'XXH3_64:8', 'sha1:20') so the cache can
+    # tell digests from different hash functions apart
+    proto = hash_func()
+    name = getattr(proto, 'name', None) or getattr(hash_func, '__qualname__', repr(hash_func))
+    return f'{name}:{getattr(proto, "digest_size", 0)}'
+
+
+def _hash_to_blob(hash_value: HashValue) -> bytes:
+    # the sqlite cache stores digests as blobs; an int digest round-trips through
+    # its big-endian bytes (which for xxhash is exactly what digest() returns)
+    if isinstance(hash_value, int):
+        return hash_value.to_bytes((hash_value.bit_length() + 7) // 8 or 1, 'big')
+    return hash_value
+
+
+# Constructing a hash object per file pays for accumulator/state initialization
+# every time; copy() of a fresh prototype is a plain memcpy of that state. Both
+# xxhash and hashlib objects support copy(), anything that does not just gets
+# constructed per call. Keyed by the constructor so custom hash_funcs work too.
+_hash_proto_cache: Dict[Callable, object] = {}
+
+
+def _new_hash_obj(hash_func: Callable):
+    proto = _hash_proto_cache.get(hash_func)
+    if proto is None:
+        proto = hash_func()
+        if not hasattr(proto, 'copy'):
+            return proto # fresh and uncached, per-call construction is all we can do
+        _hash_proto_cache[hash_func] = proto
+    return proto.copy()
+
+
+# Reusable per-thread read buffer, so the hashing passes do not allocate (and
+# garbage-collect) a fresh bytes object per chunk read. It only ever grows, and
+# is thread-local because the hashing passes run on a thread pool.
+_read_buffer_tls = threading.local()
+
+
+def _get_read_buffer(size: int) -> bytearray:
+    buf = getattr(_read_buffer_tls, 'buf', None)
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+        _read_buffer_tls.buf = buf
+    return buf
+
+
+# Bump when the meaning of a stored digest changes (v2: sampled small hashes,
+# v3: xxh3_64 default digests, v4: 4096-byte sample chunks); an old cache is
+# simply dropped and rebuilt.
+_CACHE_SCHEMA_VERSION: Final[int] = 4
+
+
+class _HashCache:
+    """
+    On-disk cache of file hashes keyed by path, backed by sqlite3.
+
+    A cached digest is only served while the file's current size and mtime_ns
+    still match the values recorded at hash time, so a changed file is simply
+    rehashed. The producing hash function is recorded alongside the schema
+    version, so a cache built under another hash_func is dropped instead of
+    serving digests that can never match the fresh ones. Writes are buffered
+    and flushed once per update pass.
+    """
+    def __init__(self, cache_path: SinglePath, hash_id: str) -> None:
+        self._conn = sqlite3.connect(os.fspath(cache_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != _CACHE_SCHEMA_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS hashes')
+            self._conn.execute(f'PRAGMA user_version = {_CACHE_SCHEMA_VERSION}')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = self._conn.execute("SELECT value FROM meta WHERE key='hash_func'").fetchone()
+        if row is not None and row[0] != hash_id:
+            self._conn.execute('DROP TABLE IF EXISTS hashes')
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('hash_func', ?)", (hash_id, ))
+        self._conn.execute('CREATE TABLE IF NOT EXISTS hashes (' \
+                           'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, small BLOB, full BLOB)')
+        self._conn.commit()
+        self._lock = threading.Lock() # one connection shared by the hashing worker threads
+        self._pending_small: List[Tuple[PathStr, FileSize, int, HashValue]] = []
+        self._pending_full: List[Tuple[PathStr, FileSize, int, HashValue]] = []
+
+    def find(self, path: PathStr) -> Tuple[Optional[HashValue], Optional[HashValue]]:
+        """
+        Return the cached (small_hash, full_hash) for path, or (None, None) on miss/stale.
+        """
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None, None
+        with self._lock:
+            row = self._conn.execute('SELECT small, full FROM hashes WHERE path=? AND size=? AND mtime_ns=?',
+                                     (path, file_stat.st_size, file_stat.st_mtime_ns)).fetchone()
+        return (row[0], row[1]) if row is not None else (None, None)
+
+    def store_small(self, path: PathStr, small_hash: HashValue) -> None:
+        self._store(self._pending_small, path, small_hash)
+
+    def store_full(self, path: PathStr, full_hash: HashValue) -> None:
+        self._store(self._pending_full, path, full_hash)
+
+    def _store(self, pending: List[Tuple[PathStr, FileSize, int, HashValue]], path: PathStr, hash_value: HashValue) -> None:
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            pending.append((path, file_stat.st_size, file_stat.st_mtime_ns, hash_value))
+
+    def flush(self) -> None:
+        """
+        Write all buffered digests in one transaction. The upsert keeps the other
+        digest column only if size and mtime are unchanged, so a rewrite of the
+        file never leaves a stale sibling digest behind.
+        """
+        with self._lock:
+            pending_small, self._pending_small = self._pending_small, []
+            pending_full, self._pending_full = self._pending_full, []
+            self._conn.executemany(
+                'INSERT INTO hashes (path, size, mtime_ns, small, full) VALUES (?, ?, ?, ?, NULL) ' \
+                'ON CONFLICT(path) DO UPDATE SET small=excluded.small, ' \
+                'full=(CASE WHEN hashes.size=excluded.size AND hashes.mtime_ns=excluded.mtime_ns THEN hashes.full ELSE NULL END), ' \
+                'size=excluded.size, mtime_ns=excluded.mtime_ns', pending_small)
+            self._conn.executemany(
+                'INSERT INTO hashes (path, size, mtime_ns, small, full) VALUES (?, ?, ?, NULL, ?) ' \
+                'ON CONFLICT(path) DO UPDATE SET full=excluded.full, ' \
+                'small=(CASE WHEN hashes.size=excluded.size AND hashes.mtime_ns=excluded.mtime_ns THEN hashes.small ELSE NULL END), ' \
+                'size=excluded.size, mtime_ns=excluded.mtime_ns', pending_full)
+            self._conn.commit()
 
 
 class JustOne:
     """
     Note: JustOne object is picklable.
     """
-    def __init__(self, hash_func: Callable = HASH_FUNCTION_DEFAULT, ignore_error: bool = False) -> None:
+    def __init__(self,
+                 hash_func: Callable = HASH_FUNCTION_DEFAULT,
+                 ignore_error: bool = False,
+                 cache_path: Optional[SinglePath] = None,
+                 use_process_pool: bool = False,
+                 sort_by_inode: bool = True) -> None:
         """This sets a hash function for identifying the same file.
 
         Args:
             hash_func: A hashlib-compliant hash function. (e.g.: hashlib.sha1)
             ignore_error: Ignore the OSError such as PermissionError when dealing with files.
+            cache_path:
+                Path of an on-disk hash cache (sqlite database, created on demand).
+                Files whose size and mtime are unchanged since the cached run are
+                not rehashed, which makes repeated scans of a mostly-static tree
+                nearly I/O-free.
+            use_process_pool:
+                Run the full-hash pass on a process pool (one worker per CPU)
+                instead of the thread pool. Threads escape the GIL only inside the
+                C hash update; processes also parallelize the per-file Python work,
+                which pays off on multi-GB duplicate candidate sets. Off by default
+                because pool startup costs ~100ms, a bad deal for small trees.
+            sort_by_inode:
+                Hash candidate files in inode order instead of scan order, so a
+                cold-cache pass reads the disk roughly front-to-back (inode order
+                correlates with on-disk layout; big win on HDDs, mild on SSDs).
+                The inode comes cached on the scandir DirEntry, so this costs no
+                extra stat. No-op on Windows where inode numbers mean little.
 
         Returns:
             None
         """
-        # Member variables sample:
-        #   file_info: [
-        #     <Index, Path-Object, File-Size, Small-Hash, Full-Hash>
-        #     [0, Path('D:/abc/efg.txt'), 16801, '900150983cd24fb0', 'd6963f7d28e17f72'],
-        #     [1, Path(...), 14323, ..., ...],
-        #     [2, ...],
-        #     ...
-        #   ]
+        # Member variables sample (struct-of-arrays, all indexed by FileIndex):
+        #   paths:        ['D:/abc/efg.txt', ...]   # plain strings, Path costs too much per file
+        #   sizes:        array('q', [16801, 14323, ...])
+        #   inodes:       array('Q', [5902132, 5902140, ...])
+        #   small_hashes: [b'\x90\x01\x50\x98...', None, ...]
+        #   full_hashes:  [b'\xd6\x96\x3f\x7d...', None, ...]
         #   file_index: {
-        #       <Path-Object: Index>
-        #       Path('D:/abc/efg.txt'): 0,
-        #       Path(...): 1,
+        #       <Path-String: Index>
+        #       'D:/abc/efg.txt': 0,
         #       ...
         #   }
         self.hash_func: Callable = hash_func
         self.ignore_error: bool = ignore_error
-        self.file_info: List[Tuple[FileIndex, Path, FileSize, Optional[HashValue], Optional[HashValue]]] = []
-        self.file_index: Dict[Path, FileIndex] = {}
-        self.size_dict: DefaultDict[FileSize, Set[FileIndex]] = defaultdict(set)
-        self.small_hash_dict: DefaultDict[Tuple[FileSize, HashValue], Set[FileIndex]] = defaultdict(set)
-        self.full_hash_dict: DefaultDict[HashValue, Set[FileIndex]] = defaultdict(set)
+        self.cache_path: Optional[SinglePath] = cache_path
+        self.use_process_pool: bool = use_process_pool
+        self.sort_by_inode: bool = sort_by_inode and os.name != 'nt'
+        self._int_digests: bool = hasattr(hash_func(), 'intdigest') # xxhash family yields native int digests
+        self._cache: Optional[_HashCache] = _HashCache(cache_path, _hash_func_id(hash_func)) if cache_path is not None else None
+        # Parallel arrays instead of a list of 5-tuples: updating one field is a
+        # plain slot store instead of rebuilding a tuple, and array('q') packs the
+        # sizes at 8 bytes per entry.
+        self.paths: List[PathStr] = []
+        self.sizes: array.array = array.array('q')
+        self.inodes: array.array = array.array('Q') # from the DirEntry, 0 when unknown; only used to order reads
+        self.small_hashes: List[Optional[HashValue]] = []
+        self.full_hashes: List[Optional[HashValue]] = []
+        self.file_index: Dict[PathStr, FileIndex] = {}
+        # A directory scan yields each path exactly once, so the first scan skips
+        # file_index maintenance altogether; the dict is rebuilt lazily from
+        # self.paths if a later update() needs to dedupe against it.
+        self._file_index_complete: bool = True
+        # The three bucket dicts hold a bare int per key until a second file lands
+        # there; only colliding keys pay for a set (singletons are the common case).
+        self.size_dict: Dict[FileSize, IndexBucket] = {}
+        self.size_single: Dict[FileSize, Tuple[PathStr, int]] = {} # the lone (path, inode) of a size, kept out of file_info until a second one shows up
+        self.small_hash_dict: Dict[SmallHashKey, IndexBucket] = {}
+        self.full_hash_dict: Dict[HashValue, IndexBucket] = {}
+
+    def __getstate__(self):
+        # the sqlite connection of the hash cache is not picklable, reopen it on unpickling
+        state = self.__dict__.copy()
+        state['_cache'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.cache_path is not None:
+            self._cache = _HashCache(self.cache_path, _hash_func_id(self.hash_func))
 
     @staticmethod
     def _scan_dir(folder: Union[AnyStr, PathLike], ignore_error: bool = False) -> Iterator[DirEntry]:
@@ -197,72 +433,154 @@ class JustOne:
         Returns:
             DirEntry objects of all files in the folder with any depth.
         """
-        def _scan_dir_raw(folder: Union[AnyStr, PathLike]) -> Iterator[DirEntry]:
-            with scandir(folder) as it:
-                for entry in it:
-                    if entry.is_dir():
-                        yield from JustOne._scan_dir(entry.path, ignore_error=ignore_error)
-                    else:
-                        yield entry
-
-        if ignore_error:
+        # Iterative with an explicit stack: no recursion limit on deep trees, and no
+        # chain of suspended generator frames to resume through for every file.
+        stack: List[Union[AnyStr, PathLike]] = [folder]
+        while stack:
             try:
-                yield from _scan_dir_raw(folder)
+                it = scandir(stack.pop())
             except OSError:
-                return
-        else:
-            yield from _scan_dir_raw(folder)
+                if ignore_error:
+                    continue
+                raise
+            with it:
+                for entry in it:
+                    # is_dir/is_file(follow_symlinks=False) are served from d_type on POSIX
+                    # (or the cached find-data on Windows), no extra stat, and not following
+                    # symlinks keeps the walk loop-free. Non-regular entries (symlinks,
+                    # sockets, fifos) are dropped here, mirroring the S_ISREG check that
+                    # the explicit-files path applies.
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
 
     @staticmethod
-    def _get_hash(fp: Path,
+    def _get_hash(fp: PathStr,
                   first_chunk_only: bool = False,
                   first_chunk_size: int = SMALL_HASH_CHUNK_SIZE_DEFAULT,
                   hash_func: Callable = HASH_FUNCTION_DEFAULT) -> HashValue:
         """
-        Calculate hash for file or just for first chunk of file(the fisrt 1024bytes).
+        Calculate hash for the whole file, or just for three sample chunks of it
+        (first, middle and last first_chunk_size bytes) when first_chunk_only is set.
+        Sampling head, middle and tail costs the same as one bigger head read but
+        discriminates far better on formats with a long common header (PDF, JPEG EXIF).
+        A file that fits inside the 3-chunk sample budget is hashed completely, so its
+        sample hash equals its full hash.
+
+        Read on a raw fd with a big buffer instead of 1KB BufferedReader chunks,
+        so a 1MB file costs one `os.read` call instead of a thousand.
         """
-        def chunk_reader(freader: BufferedReader, chunk_size: int = 1024) -> Iterator[bytes]:
-            """ Generator that reads a file in chunks of bytes """
-            while True:
-                chunk = freader.read(chunk_size)
-                if not chunk:
-                    return
-                yield chunk
-
-        hash_obj = hash_func()
-        with fp.open(mode='rb') as f:
+        hash_obj = _new_hash_obj(hash_func)
+        fd = os.open(fp, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
             if first_chunk_only:
-                hash_obj.update(f.read(first_chunk_size))
+                file_size = os.fstat(fd).st_size
+                has_readv = hasattr(os, 'readv')
+                if file_size <= 3 * first_chunk_size:
+                    # the whole file fits in the sample budget
+                    if has_readv:
+                        # read into the reusable per-thread buffer, zero allocation per file
+                        mv = memoryview(_get_read_buffer(3 * first_chunk_size))[:3 * first_chunk_size]
+                        n = os.readv(fd, (mv, ))
+                        hash_obj.update(mv[:n])
+                    else:
+                        hash_obj.update(os.read(fd, 3 * first_chunk_size))
+                else:
+                    mv = memoryview(_get_read_buffer(first_chunk_size))[:first_chunk_size] if has_readv else None
+                    for offset in (0, file_size // 2, file_size - first_chunk_size):
+                        os.lseek(fd, offset, os.SEEK_SET)
+                        if has_readv:
+                            n = os.readv(fd, (mv, ))
+                            hash_obj.update(mv[:n])
+                        else:
+                            hash_obj.update(os.read(fd, first_chunk_size))
+            elif os.fstat(fd).st_size >= MMAP_MIN_FILE_SIZE_DEFAULT:
+                # one C-level update over the whole mapping, no Python read loop at all
+                mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                try:
+                    if hasattr(mm, 'madvise'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    hash_obj.update(memoryview(mm))
+                finally:
+                    mm.close()
             else:
-                for chunk in chunk_reader(f, chunk_size=FULL_HASH_CHUNK_SIZE_DEFAULT):
-                    hash_obj.update(chunk)
-        return hash_obj.digest()
+                if hasattr(os, 'posix_fadvise'):
+                    # tell the page cache we read front-to-back so it prefetches ahead
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                file_digest = getattr(hashlib, 'file_digest', None)
+                if file_digest is not None:
+                    # Python 3.11+: the stdlib runs the readinto-and-update loop over a
+                    # reused buffer, so there is no per-chunk bytes allocation and the
+                    # whole file is one call from here (works for xxhash objects too,
+                    # file_digest only needs a hashlib-compliant update/digest).
+                    with open(fd, 'rb', buffering=0, closefd=False) as f:
+                        hash_obj = file_digest(f, lambda h=hash_obj: h) # feed our prototype copy, not a new object
+                else:
+                    # pre-3.11 fallback: readinto the reusable per-thread buffer, one
+                    # allocation for the whole pass instead of one bytes per chunk
+                    mv = memoryview(_get_read_buffer(FULL_HASH_CHUNK_SIZE_DEFAULT))[:FULL_HASH_CHUNK_SIZE_DEFAULT]
+                    with open(fd, 'rb', buffering=0, closefd=False) as f:
+                        while True:
+                            n = f.readinto(mv)
+                            if not n:
+                                break
+                            hash_obj.update(mv[:n])
+        finally:
+            os.close(fd)
+        # an int digest hashes as itself in the bucket dicts (no SipHash over bytes)
+        return hash_obj.intdigest() if hasattr(hash_obj, 'intdigest') else hash_obj.digest()
+
+    def _ensure_file_index(self) -> None:
+        """
+        Rebuild the path -> index dict if a no-dedupe directory scan skipped filling it.
+        """
+        if not self._file_index_complete:
+            self.file_index = {file: index for index, file in enumerate(self.paths)}
+            self._file_index_complete = True
 
-    def _get_file_info(self, index: FileIndex) -> Tuple[Path, FileSize, Optional[HashValue], Optional[HashValue]]:
+    def _get_file_info(self, index: FileIndex) -> Tuple[PathStr, FileSize, Optional[HashValue], Optional[HashValue]]:
         """
-        Get file info from self.file_info .
+        Get file info from the parallel file info arrays.
         """
         try:
-            _, file, file_size, small_hash, full_hash = self.file_info[index]
+            return self.paths[index], self.sizes[index], self.small_hashes[index], self.full_hashes[index]
         except IndexError as e:
             raise GetFileInfoError from e
-        return file, file_size, small_hash, full_hash
 
     def _add_file_info(self,
-                       file: Path,
+                       file: PathStr,
                        file_size: Optional[FileSize] = None,
                        small_hash: Optional[HashValue] = None,
-                       full_hash: Optional[HashValue] = None) -> FileIndex:
+                       full_hash: Optional[HashValue] = None,
+                       inode: int = 0,
+                       dedupe: bool = True) -> FileIndex:
         """
-        Add file info to self.file_info .
+        Add file info to the parallel file info arrays.
         If file is existed, do nothing.
+        With dedupe=False the path -> index dict is neither consulted nor filled;
+        only safe when the caller guarantees the paths are fresh and unique.
         """
-        index = self.file_index.get(file, None)
-        if index is None:
-            file_size = file.stat().st_size if file_size is None else file_size
-            index = len(self.file_info)
+        if dedupe:
+            self._ensure_file_index()
+            # interning makes repeat lookups of a known path compare by pointer
+            # (dict hit without re-hashing the whole string) and dedupes the
+            # stored copy against any equal string a later update() passes in
+            file = sys.intern(file)
+            index = self.file_index.get(file, None)
+            if index is not None:
+                return index
+        index = len(self.paths)
+        if dedupe:
             self.file_index[file] = index
-            self.file_info.append((index, file, file_size, small_hash, full_hash))
+        else:
+            self._file_index_complete = False
+        file_size = os.stat(file).st_size if file_size is None else file_size
+        self.paths.append(file)
+        self.sizes.append(file_size)
+        self.inodes.append(inode)
+        self.small_hashes.append(small_hash)
+        self.full_hashes.append(full_hash)
         return index
 
     def _update_file_info(self,
@@ -271,45 +589,158 @@ class JustOne:
                           small_hash: Optional[HashValue] = None,
                           full_hash: Optional[HashValue] = None) -> FileIndex:
         """
-        Update file info to self.file_info, only support file-size, small-hash and full-hash.
+        Update the file info arrays, only support file-size, small-hash and full-hash.
         """
         try:
-            index, file, file_size_old, small_hash_old, full_hash_old = self.file_info[index]
-            file_size = file_size_old if file_size is None else file_size
-            small_hash = small_hash or small_hash_old
-            full_hash = full_hash or full_hash_old
-            self.file_info[index] = (index, file, file_size, small_hash, full_hash)
+            if file_size is not None:
+                self.sizes[index] = file_size
+            if small_hash is not None:
+                self.small_hashes[index] = small_hash
+            if full_hash is not None:
+                self.full_hashes[index] = full_hash
         except IndexError as e:
             raise UpdateFileInfoError from e
         return index
 
     def _get_small_hash(self, index: FileIndex) -> HashValue:
         """
-        If small hash is existed, use it. Otherwise, calculate the small hash, update it and return.
+        If small hash is existed, use it. Otherwise, calculate the small hash and return.
+        Never mutates the file info arrays, so it is safe to call from worker threads;
+        the caller stores the result via _update_file_info on the main thread.
         """
         try:
-            index, file, file_size, small_hash, full_hash = self.file_info[index]
+            small_hash = self.small_hashes[index]
         except IndexError as e:
             raise GetSmallHashError from e
         if small_hash is None:
-            small_hash = self._get_hash(file, first_chunk_only=True, hash_func=self.hash_func)
-            self.file_info[index] = (index, file, file_size, small_hash, full_hash)
+            path = self.paths[index]
+            if self._cache is not None:
+                cached, _ = self._cache.find(path)
+                if cached is not None:
+                    return int.from_bytes(cached, 'big') if self._int_digests else cached
+            small_hash = self._get_hash(path, first_chunk_only=True, hash_func=self.hash_func)
+            if self._cache is not None:
+                self._cache.store_small(path, _hash_to_blob(small_hash))
         return small_hash
 
     def _get_full_hash(self, index: FileIndex) -> HashValue:
         """
-        If full hash is existed, use it. Otherwise, calculate the full hash, update it and return.
+        If full hash is existed, use it. Otherwise, calculate the full hash and return.
+        Never mutates the file info arrays, so it is safe to call from worker threads;
+        the caller stores the result via _update_file_info on the main thread.
         """
         try:
-            index, file, file_size, small_hash, full_hash = self.file_info[index]
+            full_hash = self.full_hashes[index]
         except IndexError as e:
             raise GetFullHashError from e
         if full_hash is None:
-            full_hash = self._get_hash(file, first_chunk_only=False, hash_func=self.hash_func)
-            self.file_info[index] = (index, file, file_size, small_hash, full_hash)
+            path = self.paths[index]
+            if self._cache is not None:
+                _, cached = self._cache.find(path)
+                if cached is not None:
+                    return int.from_bytes(cached, 'big') if self._int_digests else cached
+            full_hash = self._get_hash(path, first_chunk_only=False, hash_func=self.hash_func)
+            if self._cache is not None:
+                self._cache.store_full(path, _hash_to_blob(full_hash))
         return full_hash
 
-    def _merge_size_dict(self, size_dict_temp: Dict[FileSize, Set[FileIndex]]) -> Iterator[Tuple[FileSize, FileIndex]]:
+    def _get_hashes_parallel(self, file_indices: Iterable[FileIndex], get_hash_one: Callable[[FileIndex], HashValue],
+                             desc: str) -> Iterator[Tuple[FileIndex, HashValue]]:
+        """
+        Run _get_small_hash or _get_full_hash for many files on a thread pool.
+
+        Hashing releases the GIL inside the C update and concurrent reads keep the
+        disk queue busy, so the two passes overlap I/O with compute across files.
+        Results are yielded on the calling thread, so all dict and file-info
+        mutation stays single-threaded.
+
+        Ignore the FileNotFoundError and PermissionError if self.ignore_error is True.
+        """
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS_DEFAULT) as executor:
+            future_to_index = {executor.submit(get_hash_one, file_index): file_index for file_index in file_indices}
+            for future in tqdm(as_completed(future_to_index), desc, total=len(future_to_index)):
+                file_index = future_to_index[future]
+                try:
+                    hash_value = future.result()
+                # the file access might've changed till the exec point got here
+                except (FileNotFoundError, PermissionError) as e:
+                    if self.ignore_error:
+                        continue
+                    raise UpdateError from e
+                except OSError as e: # TODO: replace with more specific Exceptions
+                    raise UpdateError from e
+                yield file_index, hash_value
+
+    def _get_full_hashes_process_pool(self, file_indices: Iterable[FileIndex]) -> Iterator[Tuple[FileIndex, HashValue]]:
+        """
+        Full-hash many files on a process pool (see the use_process_pool flag).
+
+        The hash cache is consulted and filled on the main process only, so the
+        workers just run the picklable static _get_hash on a path.
+
+        Ignore the FileNotFoundError and PermissionError if self.ignore_error is True.
+        """
+        pending: List[FileIndex] = []
+        for file_index in file_indices:
+            full_hash = self.full_hashes[file_index]
+            if full_hash is None and self._cache is not None:
+                _, cached = self._cache.find(self.paths[file_index])
+                if cached is not None:
+                    full_hash = int.from_bytes(cached, 'big') if self._int_digests else cached
+            if full_hash is not None:
+                yield file_index, full_hash
+            else:
+                pending.append(file_index)
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            future_to_index = {pool.submit(JustOne._get_hash, self.paths[i], hash_func=self.hash_func): i for i in pending}
+            for future in tqdm(as_completed(future_to_index), 'Fill full-hash-dict', total=len(future_to_index)):
+                file_index = future_to_index[future]
+                try:
+                    full_hash = future.result()
+                # the file access might've changed till the exec point got here
+                except (FileNotFoundError, PermissionError) as e:
+                    if self.ignore_error:
+                        continue
+                    raise UpdateError from e
+                except OSError as e: # TODO: replace with more specific Exceptions
+                    raise UpdateError from e
+                if self._cache is not None:
+                    self._cache.store_full(self.paths[file_index], _hash_to_blob(full_hash))
+                yield file_index, full_hash
+
+    @staticmethod
+    def _merge_bucket_dict(bucket_dict: Dict, bucket_dict_temp: Dict) -> Iterator[Tuple[object, Iterable[FileIndex]]]:
+        """
+        Merge temp buckets into a persistent bucket dict (see IndexBucket: a bucket
+        stays a bare index while it holds one file, and becomes a set on collision).
+        Yield (key, indices) for every key holding more than one file after the
+        merge: all members when the bucket just got promoted to a group, otherwise
+        only the newly added ones (the old members were processed earlier).
+
+        The temp buckets arrive as lists (append is cheaper than set.add in the
+        per-file loops) and are turned into sets here, once per key.
+        """
+        for k, v in bucket_dict_temp.items():
+            v = set(v)
+            bucket = bucket_dict.get(k)
+            if bucket is None:
+                if len(v) == 1:
+                    for index in v:
+                        bucket_dict[k] = index # the bare index, no set allocated
+                    continue
+                bucket_dict[k] = v
+                yield k, v
+            elif isinstance(bucket, int):
+                v.add(bucket)
+                if len(v) == 1:
+                    continue # the very same lone file again, still a singleton
+                bucket_dict[k] = v
+                yield k, v
+            else:
+                bucket |= v
+                yield k, v
+
+    def _merge_size_dict(self, size_dict_temp: Dict[FileSize, List[FileIndex]]) -> Iterator[Tuple[FileSize, FileIndex]]:
         """
         Merge the new size-dict to self.size_dict .
         Return
@@ -317,30 +748,20 @@ class JustOne:
           AND
           the file(with file-size) which had no duplicates originally but has now.
         """
-        for k, v in size_dict_temp.items():
-            index_set = self.size_dict[k]
-            is_single = len(index_set) == 1
-            index_set |= v
-            if len(index_set) > 1:
-                for index in (index_set if is_single else v):
-                    yield k, index
+        for k, indices in self._merge_bucket_dict(self.size_dict, size_dict_temp):
+            # zip + repeat pairs the indices at C level instead of a Python loop
+            yield from zip(itertools.repeat(k), indices)
 
-    def _merge_small_hash_dict(self, small_hash_dict_temp: Dict[Tuple[FileSize, HashValue], Set[FileIndex]]) -> Iterator[FileIndex]:
+    def _merge_small_hash_dict(self, small_hash_dict_temp: Dict[SmallHashKey, List[FileIndex]]) -> Iterator[SmallHashKey]:
         """
         Merge the new small-hash-dict to self.small_hash_dict .
-        Return
-          the file(with file-size) whose duplicates are existed,
-          AND
-          the file(with file-size) which had no duplicates originally but has now.
+        Return the keys (packed file-size and small-hash) whose merged group now
+        holds more than one file, i.e. the groups which must be told apart by full hash.
         """
-        for k, v in small_hash_dict_temp.items():
-            index_set = self.small_hash_dict[k]
-            is_single = len(index_set) == 1
-            index_set |= v
-            if len(index_set) > 1:
-                yield from (index_set if is_single else v)
+        for k, _ in self._merge_bucket_dict(self.small_hash_dict, small_hash_dict_temp):
+            yield k
 
-    def _merge_full_hash_dict(self, full_hash_dict_temp: DefaultDict[HashValue, Set[FileIndex]]) -> Iterator[FileIndex]:
+    def _merge_full_hash_dict(self, full_hash_dict_temp: Dict[HashValue, List[FileIndex]]) -> Iterator[FileIndex]:
         """
         Merge the new full-hash-dict to self.full_hash_dict .
         Return
@@ -348,48 +769,155 @@ class JustOne:
           AND
           the file(with file-size) which had no duplicates originally but has now.
         """
-        for k, v in full_hash_dict_temp.items():
-            index_set = self.full_hash_dict[k]
-            is_single = len(index_set) == 1
-            index_set |= v
-            if len(index_set) > 1:
-                yield from (index_set if is_single else v)
+        for _, indices in self._merge_bucket_dict(self.full_hash_dict, full_hash_dict_temp):
+            yield from indices
 
-    def _update_multiple_files_with_size(self, files_with_size: Iterable[Tuple[Path, FileSize]]) -> Set[FileIndex]:
+    def _prefetch_small_chunks(self, file_indices: Iterable[FileIndex]) -> None:
+        """
+        Queue kernel readahead on the sample regions of every small-hash candidate
+        before the hashing threads get there. posix_fadvise(WILLNEED) returns
+        without waiting for the I/O, so this loop batch-submits all the small reads
+        back-to-back and the device sees a deep queue instead of one synchronous
+        pread per file; the pool threads then mostly hit the page cache. No-op on
+        platforms without posix_fadvise.
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        chunk = SMALL_HASH_CHUNK_SIZE_DEFAULT
+        for file_index in file_indices:
+            try:
+                fd = os.open(self.paths[file_index], os.O_RDONLY)
+            except OSError:
+                continue # the hashing pass will surface (or ignore) the error properly
+            try:
+                file_size = self.sizes[file_index]
+                if file_size <= 3 * chunk:
+                    os.posix_fadvise(fd, 0, file_size, os.POSIX_FADV_WILLNEED)
+                else:
+                    for offset in (0, file_size // 2, file_size - chunk):
+                        os.posix_fadvise(fd, offset, chunk, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _prefetch_file_heads(self, file_indices: Iterable[FileIndex]) -> None:
+        """
+        Queue kernel readahead on the head of every full-hash candidate before the
+        hashing pool runs, and declare the upcoming access sequential. Only the
+        first chunk is requested (WILLNEED on a whole multi-GB file would evict
+        more cache than it warms); once a worker starts reading, the SEQUENTIAL
+        hint keeps readahead rolling for the rest. The fds are closed right away,
+        the warmed pages stay in the cache. No-op without posix_fadvise.
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        for file_index in file_indices:
+            try:
+                fd = os.open(self.paths[file_index], os.O_RDONLY)
+            except OSError:
+                continue # the hashing pass will surface (or ignore) the error properly
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, min(self.sizes[file_index], FULL_HASH_CHUNK_SIZE_DEFAULT), os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _sorted_by_inode(self, file_indices: Iterable[FileIndex]) -> Iterable[FileIndex]:
+        """
+        Order hash candidates by inode so cold reads hit the disk roughly in
+        layout order (see the sort_by_inode flag). Pass-through when disabled.
+        """
+        if not self.sort_by_inode:
+            return file_indices
+        return sorted(file_indices, key=self.inodes.__getitem__)
+
+    def _update_multiple_files_with_size(self, files_with_size: Iterable[Tuple[PathStr, FileSize, int]], dedupe_paths: bool = True) -> Set[FileIndex]:
         """
         Core function for update new files to JustOne object.
 
+        dedupe_paths=False skips the path -> index dict checks; only the first
+        directory scan may pass it, where every path is known to be fresh.
+
         Ignore the FileNotFoundError and PermissionError if self.ignore_error is True.
         """
-        size_dict_temp: DefaultDict[FileSize, Set[FileIndex]] = defaultdict(set)
-        small_hash_dict_temp: DefaultDict[Tuple[FileSize, HashValue], Set[FileIndex]] = defaultdict(set)
-        full_hash_dict_temp: DefaultDict[HashValue, Set[FileIndex]] = defaultdict(set)
+        # list-valued temp buckets: every file is appended exactly once per pass,
+        # so the dedupe a set would buy is done once per key at merge time instead
+        size_dict_temp: DefaultDict[FileSize, List[FileIndex]] = defaultdict(list)
+        small_hash_dict_temp: DefaultDict[SmallHashKey, List[FileIndex]] = defaultdict(list)
+        full_hash_dict_temp: DefaultDict[HashValue, List[FileIndex]] = defaultdict(list)
         duplicate_files_index: Set[FileIndex] = set()
-        for file, file_size in tqdm(files_with_size, 'Fill size-dict'):
-            try:
-                file_index = self._add_file_info(file, file_size=file_size)
-            # the file access might've changed till the exec point got here
-            except FileNotFoundError as e:
-                if self.ignore_error:
+        # this loop runs once per scanned file, so hoist every repeated attribute
+        # and method lookup into a local first: LOAD_FAST beats LOAD_ATTR plus
+        # method binding at each of potentially millions of iterations
+        size_dict = self.size_dict
+        size_single = self.size_single
+        size_single_get = size_single.get
+        add_file_info = self._add_file_info
+        ignore_error = self.ignore_error
+        for file, file_size, inode in tqdm(files_with_size, 'Fill size-dict'):
+            if file_size not in size_dict and file_size not in size_dict_temp:
+                # Most sizes never collide, so do not pay file_info/file_index
+                # bookkeeping for a lone file; park it until a second one shows up.
+                pending = size_single_get(file_size)
+                if pending is None:
+                    size_single[file_size] = (file, inode)
                     continue
-                raise UpdateError from e
-            size_dict_temp[file_size].add(file_index)
-        for file_size, file_index in tqdm(self._merge_size_dict(size_dict_temp), 'Fill small-hash-dict'):
+                pending_file, pending_inode = pending
+                if pending_file == file:
+                    continue
+                del size_single[file_size]
+                pending_index = add_file_info(pending_file, file_size=file_size, inode=pending_inode, dedupe=dedupe_paths)
+                size_dict_temp[file_size].append(pending_index)
             try:
-                small_hash = self._get_small_hash(file_index)
+                file_index = add_file_info(file, file_size=file_size, inode=inode, dedupe=dedupe_paths)
             # the file access might've changed till the exec point got here
-            except (FileNotFoundError, PermissionError) as e:
-                if self.ignore_error:
+            except FileNotFoundError as e:
+                if ignore_error:
                     continue
                 raise UpdateError from e
-            except OSError as e:
-                raise UpdateError from e
-            small_hash_dict_temp[(file_size, small_hash)].add(file_index)
-        # For all files with the hash on the first 1024 bytes, get their hash on the full
+            size_dict_temp[file_size].append(file_index)
+        small_hash_candidates: Dict[FileIndex, FileSize] = dict((i, s) for s, i in self._merge_size_dict(size_dict_temp))
+        sorted_small_candidates = self._sorted_by_inode(small_hash_candidates)
+        self._prefetch_small_chunks(sorted_small_candidates)
+        for file_index, small_hash in self._get_hashes_parallel(sorted_small_candidates, self._get_small_hash, 'Fill small-hash-dict'):
+            file_size = small_hash_candidates[file_index]
+            if file_size <= 3 * SMALL_HASH_CHUNK_SIZE_DEFAULT:
+                # the small hash already covered the whole file, no need to read it again
+                self._update_file_info(file_index, small_hash=small_hash, full_hash=small_hash)
+            else:
+                self._update_file_info(file_index, small_hash=small_hash)
+            small_hash_dict_temp[_make_small_hash_key(file_size, small_hash)].append(file_index)
+        # For all files with the hash on the sample chunks, get their hash on the full
         # file - collisions will be duplicates
-        for file_index in tqdm(self._merge_small_hash_dict(small_hash_dict_temp), 'Fill full-hash-dict'):
+        full_hash_candidates: Set[FileIndex] = set()
+        pair_candidates: List[Tuple[FileIndex, FileIndex]] = []
+        for key in self._merge_small_hash_dict(small_hash_dict_temp):
+            index_group = self.small_hash_dict[key]
+            no_hash_members: List[FileIndex] = []
+            for file_index in index_group:
+                _, _, _, full_hash = self._get_file_info(file_index)
+                if full_hash is None:
+                    no_hash_members.append(file_index)
+                elif _is_pair_sentinel(full_hash) and len(index_group) > 2:
+                    # a byte-compared pair gained company, redo its members for real
+                    self.full_hash_dict.pop(full_hash, None)
+                    self.full_hashes[file_index] = None
+                    no_hash_members.append(file_index)
+                else:
+                    full_hash_dict_temp[full_hash].append(file_index)
+            if len(index_group) == 2 and len(no_hash_members) == 2:
+                # a lone pair is cheaper to byte-compare than to hash twice
+                pair_candidates.append((no_hash_members[0], no_hash_members[1]))
+            else:
+                full_hash_candidates.update(no_hash_members)
+        for index_a, index_b in tqdm(pair_candidates, 'Byte-compare pairs'):
+            file_a, _, _, _ = self._get_file_info(index_a)
+            file_b, _, _, _ = self._get_file_info(index_b)
             try:
-                full_hash = self._get_full_hash(file_index)
+                is_same = filecmp.cmp(file_a, file_b, shallow=False)
             # the file access might've changed till the exec point got here
             except (FileNotFoundError, PermissionError) as e:
                 if self.ignore_error:
@@ -397,20 +925,34 @@ class JustOne:
                 raise UpdateError from e
             except OSError as e: # TODO: replace with more specific Exceptions
                 raise UpdateError from e
-            full_hash_dict_temp[full_hash].add(file_index)
+            for file_index in (index_a, index_b):
+                full_hash = _make_pair_sentinel(min(index_a, index_b) if is_same else file_index)
+                self._update_file_info(file_index, full_hash=full_hash)
+                full_hash_dict_temp[full_hash].append(file_index)
+        sorted_full_candidates = self._sorted_by_inode(full_hash_candidates)
+        self._prefetch_file_heads(sorted_full_candidates)
+        if self.use_process_pool:
+            full_hash_results = self._get_full_hashes_process_pool(sorted_full_candidates)
+        else:
+            full_hash_results = self._get_hashes_parallel(sorted_full_candidates, self._get_full_hash, 'Fill full-hash-dict')
+        for file_index, full_hash in full_hash_results:
+            self._update_file_info(file_index, full_hash=full_hash)
+            full_hash_dict_temp[full_hash].append(file_index)
         for file_index in tqdm(self._merge_full_hash_dict(full_hash_dict_temp), 'Get duplicate-files'):
             duplicate_files_index.add(file_index)
+        if self._cache is not None:
+            self._cache.flush()
         return duplicate_files_index
 
     def _update_multiple_files(self, files: IterablePaths) -> Set[FileIndex]:
         """
         Update multiple regular files to JustOne object.
         """
-        files_with_size: List[Tuple[Path, FileSize]] = []
+        files_with_size: List[Tuple[PathStr, FileSize, int]] = []
         for file in tqdm(files, 'Get size-of-file'):
-            file = Path(file)
+            file = os.path.normpath(os.fspath(file))
             try:
-                file_stat = file.stat()
+                file_stat = os.stat(file)
             except FileNotFoundError as e:
                 if self.ignore_error:
                     continue
@@ -420,24 +962,66 @@ class JustOne:
                 if self.ignore_error:
                     continue
                 raise UpdateError(f'Not a Regular File: {file}')
-            file_size = file_stat.st_size
-            files_with_size.append((file, file_size))
+            files_with_size.append((file, file_stat.st_size, file_stat.st_ino))
         return self._update_multiple_files_with_size(files_with_size)
 
     def _update_multiple_directories(self, dirs: IterablePaths) -> Set[FileIndex]:
         """
         Update multiple directories(all inner files recursively) to JustOne object.
         """
+        # normalize the roots once so every entry.path below them comes out normalized
+        # for free, and drop duplicate or nested roots so one scan never yields the
+        # same file twice; an ancestor always sorts before its descendants, but a
+        # sibling may sort between them (e.g. 'a', 'a b', 'a/x'), so every kept
+        # root must be checked, not just the previous one
+        roots: List[PathStr] = [os.path.normpath(os.fspath(d)) for d in dirs]
+        covered: Set[PathStr] = set()
+        kept: List[PathStr] = []
+        for d in sorted(set(roots)):
+            if any(_root_covers(k, d) for k in kept):
+                covered.add(d)
+            else:
+                kept.append(d)
+        # a fresh scan on an empty object cannot re-add a known path, so the path
+        # -> index dict can be skipped entirely (the common one-shot case) — but
+        # only while a single root runs: disjointness of several roots is judged
+        # lexically above, so any overlap it misses must be caught by the index
+        dedupe_paths = bool(self.paths) or len(kept) > 1
         files_with_size_iters: List[Generator] = []
+        seen_roots: Set[PathStr] = set()
         try:
-            for d in dirs:
-                files_with_size_iters.append(
-                    (Path(entry.path), entry.stat().st_size) for entry in tqdm(JustOne._scan_dir(d, ignore_error=self.ignore_error), 'Dig all file'))
+            for d in roots:
+                if d in covered or d in seen_roots:
+                    continue
+                seen_roots.add(d)
+                # inode() is free on POSIX (cached from readdir) but a real per-file
+                # syscall on Windows, where sort_by_inode is off and the value unused
+                if d == os.curdir:
+                    # scandir('.') spells every entry './x', which would never compare
+                    # equal to the same file reached through an explicit root ('x'),
+                    # so this one root pays a normpath per entry
+                    files_with_size_iters.append(
+                        (os.path.normpath(entry.path), entry.stat(follow_symlinks=False).st_size, entry.inode() if self.sort_by_inode else 0)
+                        for entry in tqdm(JustOne._scan_dir(d, ignore_error=self.ignore_error), 'Dig all file'))
+                else:
+                    files_with_size_iters.append(
+                        (entry.path, entry.stat(follow_symlinks=False).st_size, entry.inode() if self.sort_by_inode else 0)
+                        for entry in tqdm(JustOne._scan_dir(d, ignore_error=self.ignore_error), 'Dig all file'))
         except OSError as e: # TODO: replace with more specific Exceptions
             # not accessible (permissions, etc)
             raise UpdateError from e
-        files_with_size: Iterator[Tuple[Path, FileSize]] = itertools.chain(*files_with_size_iters)
-        return self._update_multiple_files_with_size(files_with_size)
+
+        def guard_scan_errors(iterable: Iterator[Tuple[PathStr, FileSize, int]]) -> Iterator[Tuple[PathStr, FileSize, int]]:
+            # the scan generators above are consumed lazily inside the size pass,
+            # so an OSError from scandir/stat (permissions, etc) surfaces there;
+            # keep the documented UpdateError contract for it
+            try:
+                yield from iterable
+            except OSError as e:
+                raise UpdateError from e
+
+        files_with_size: Iterator[Tuple[PathStr, FileSize, int]] = guard_scan_errors(itertools.chain(*files_with_size_iters))
+        return self._update_multiple_files_with_size(files_with_size, dedupe_paths=dedupe_paths)
 
     # No use for the time being.
     def _update_single_file(self, single_file: SinglePath) -> Set[FileIndex]:
@@ -472,11 +1056,13 @@ class JustOne:
         * Not support mix file and directory as arguments, such as update(file_1, dir_1) OR update(file_1, [dir_1, dir_2]).
         """
         args_iter = itertools.chain(*((a, ) if isinstance(a, (str, Path)) else a for a in (arg, *args)))
-        args_iter, peek = itertools.tee(args_iter)
-        first = next(peek, None)
+        # peek at the first element by pulling it and chaining it back on; unlike
+        # itertools.tee this buffers exactly one element, not the whole iterator
+        first = next(args_iter, None)
         if first is None:
             # No Path element in arg and args
             return self
+        args_iter = itertools.chain((first, ), args_iter)
         if Path(first).is_dir():
             result: Set[FileIndex] = self._update_multiple_directories(args_iter)
         else:
@@ -489,28 +1075,31 @@ class JustOne:
         """
         Get duplicate files by hash value.
         """
-        for _, v in self.full_hash_dict.items():
-            dups = tuple(self._get_file_info(file_index)[0] for file_index in v)
-            if len(dups) > 1:
-                yield dups
+        paths = self.paths # direct slot reads, no per-index _get_file_info call and tuple unpack
+        for v in self.full_hash_dict.values():
+            if not isinstance(v, int): # a set bucket always holds at least two files
+                yield tuple(Path(paths[file_index]) for file_index in v)
 
     def _duplicates_strict(self, shallow=True) -> Iterator[Sequence[Path]]:
         """
         Check the files which have same hash by filecmp, shallow or deep comparison.
         """
-        for _, v in self.full_hash_dict.items():
-            if len(v) <= 1:
+        paths = self.paths
+        for v in self.full_hash_dict.values():
+            if isinstance(v, int): # a singleton bucket has no duplicates to check
                 continue
-            diff_files: List[List[Path]] = [] # [[A_1, A_2], [B_1, B_2, B_3], [C_1]]
-            files = tuple(self._get_file_info(file_index)[0] for file_index in v)
-            for file in files:
+            diff_files: List[List[PathStr]] = [] # [[A_1, A_2], [B_1, B_2, B_3], [C_1]]
+            for file_index in v:
+                file = paths[file_index]
                 for same_files in diff_files:
                     first = same_files[0]
                     if filecmp.cmp(file, first, shallow=shallow):
                         same_files.append(file)
                         break
-                diff_files.append([file])
-            yield from diff_files
+                else:
+                    diff_files.append([file])
+            # a subgroup of one has no duplicates, don't yield it
+            yield from (tuple(Path(f) for f in same_files) for same_files in diff_files if len(same_files) > 1)
 
     def duplicates(self, strict_level: Union[StrictLevel, Literal[0, 1, 2]] = STRICT_LEVEL_DEFAULT) -> Iterator[Sequence[Path]]:
         """Get duplicate files.
@@ -25,6 +25,9 @@ setuptools.setup(
         'Operating System :: Microsoft :: Windows :: Windows 10',
     ],
     python_requires='>=3.8',
+    install_requires=[
+        'xxhash',
+    ],
     entry_points={
         'console_scripts': [
             'justone = justone:main',